@@ -1,10 +1,11 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
 import json
 import sqlite3
 from datetime import datetime
+import time
 import anthropic
 from openai import OpenAI
 from docx import Document
@@ -14,27 +15,64 @@ import PyPDF2
 import io
 import base64
 import tempfile
+import threading
 from fpdf import FPDF
 
+# Ladda miljövariabler (före de lokala modulerna, som läser sina sökvägar vid import)
+load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+from storage import compress_text, decompress_text, decompress_row, migrate_compressed_columns
+from archive import (ARCHIVE_DB_PATH, init_archive_db, archive_candidates, search_archive,
+                     get_archived_fields, restore_candidate, delete_archived, incremental_vacuum)
+from similarity import (init_similarity_tables, index_cv, remove_from_index, minhash_signature,
+                        unpack_signature, find_similar)
+from static_assets import build_manifest, choose_variant, resolve_build_dir
+
 # Konfigurera ffmpeg för moviepy
 os.environ['IMAGEIO_FFMPEG_EXE'] = 'C:/Users/krist/ffmpeg/ffmpeg-8.0.1-essentials_build/bin/ffmpeg.exe'
 from moviepy import AudioFileClip
 
-# Ladda miljövariabler
-load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
-
-FRONTEND_BUILD = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'build')
-app = Flask(__name__, static_folder=FRONTEND_BUILD, static_url_path='')
+FRONTEND_DIR = os.path.join(os.path.dirname(__file__), '..', 'frontend')
+# Frontend-filerna serveras av serve_frontend via manifestet, inte av Flasks static-route
+app = Flask(__name__, static_folder=None)
 CORS(app)
 
+STATIC_BUILD_DIR = resolve_build_dir(FRONTEND_DIR)
+STATIC_MANIFEST = build_manifest(STATIC_BUILD_DIR)
+_manifest_lock = threading.Lock()
+
+def reload_manifest_if_changed(force=False):
+    """Läs in manifestet på nytt om start.py har pekat ut en ny build-mapp"""
+    global STATIC_BUILD_DIR, STATIC_MANIFEST
+    with _manifest_lock:
+        build_dir = resolve_build_dir(FRONTEND_DIR)
+        if build_dir == STATIC_BUILD_DIR and not force:
+            return False
+        STATIC_MANIFEST = build_manifest(build_dir)
+        STATIC_BUILD_DIR = build_dir
+    print(f"Frontend-build inläst från {build_dir}")
+    return True
+
+def watch_frontend_build(interval=2):
+    """Byt manifest när start.py har publicerat en ny build"""
+    while True:
+        time.sleep(interval)
+        try:
+            reload_manifest_if_changed()
+        except OSError as e:
+            print(f"Kunde inte läsa frontend-build: {e}")
+
+threading.Thread(target=watch_frontend_build, daemon=True).start()
+
 # API-klienter
 anthropic_client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
 openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # Databas-setup
-DB_PATH = os.path.join(os.path.dirname(__file__), 'rekrytering.db')
+DB_PATH = os.getenv('DB_PATH', os.path.join(os.path.dirname(__file__), 'rekrytering.db'))
 
 def init_db():
+    init_archive_db()
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
 
@@ -61,6 +99,62 @@ def init_db():
         FOREIGN KEY (role_id) REFERENCES roles (id)
     )''')
 
+    c.execute('''CREATE TABLE IF NOT EXISTS api_usage (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        call_type TEXT,
+        model TEXT,
+        input_tokens INTEGER,
+        output_tokens INTEGER,
+        cache_creation_input_tokens INTEGER,
+        cache_read_input_tokens INTEGER,
+        duration_ms INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''')
+
+    # Version 1: cv_text, transcript och analysis lagras zlib-komprimerade
+    if c.execute('PRAGMA user_version').fetchone()[0] < 1:
+        migrated = migrate_compressed_columns(conn)
+        c.execute('PRAGMA user_version = 1')
+        conn.commit()
+        if migrated:
+            print(f"Komprimerade {migrated} befintliga textfält")
+            conn.execute('VACUUM')
+
+    # Version 2: stängda roller, arkiverade kandidater och incremental vacuum
+    if c.execute('PRAGMA user_version').fetchone()[0] < 2:
+        c.execute('ALTER TABLE roles ADD COLUMN closed INTEGER DEFAULT 0')
+        c.execute('ALTER TABLE candidates ADD COLUMN archived INTEGER DEFAULT 0')
+        c.execute('''CREATE INDEX IF NOT EXISTS idx_candidates_hot
+                     ON candidates (archived, total_score DESC, created_at DESC)''')
+        c.execute('PRAGMA user_version = 2')
+        conn.commit()
+        # auto_vacuum kan bara ändras på en befintlig databas via VACUUM
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+
+    # Version 3: MinHash/LSH-index för att hitta nära dubbletter av CV:n
+    init_similarity_tables(conn)
+    if c.execute('PRAGMA user_version').fetchone()[0] < 3:
+        rows = c.execute('''SELECT id, cv_text, archived FROM candidates
+                            WHERE cv_text IS NOT NULL OR archived = 1''').fetchall()
+        for candidate_id, cv_text, archived in rows:
+            # Arkiverade kandidater har bara en sammanfattningsrad i den varma tabellen
+            if archived:
+                cv_text = (get_archived_fields(candidate_id) or {}).get('cv_text')
+            if cv_text:
+                index_cv(conn, candidate_id, decompress_text(cv_text))
+        c.execute('PRAGMA user_version = 3')
+
+    # Version 4: tid till första token för strömmade Claude-anrop
+    if c.execute('PRAGMA user_version').fetchone()[0] < 4:
+        c.execute('ALTER TABLE api_usage ADD COLUMN ttft_ms INTEGER')
+        c.execute('PRAGMA user_version = 4')
+
+    # Version 5: återställda kandidater undantas från nästa arkivering
+    if c.execute('PRAGMA user_version').fetchone()[0] < 5:
+        c.execute('ALTER TABLE candidates ADD COLUMN restored_at TIMESTAMP')
+        c.execute('PRAGMA user_version = 5')
+
     conn.commit()
     conn.close()
 
@@ -101,6 +195,25 @@ def extract_text_from_docx(file):
 def health_check():
     return jsonify({"status": "ok", "message": "Backend körs!"})
 
+@app.route('/api/usage', methods=['GET'])
+def get_usage():
+    """Sammanställ tokenförbrukning och cache-träffar per anropstyp"""
+    conn = get_db()
+    rows = conn.execute('''
+        SELECT call_type,
+               COUNT(*) as calls,
+               SUM(input_tokens) as input_tokens,
+               SUM(output_tokens) as output_tokens,
+               SUM(cache_creation_input_tokens) as cache_creation_input_tokens,
+               SUM(cache_read_input_tokens) as cache_read_input_tokens,
+               AVG(ttft_ms) as avg_ttft_ms,
+               AVG(duration_ms) as avg_duration_ms
+        FROM api_usage
+        GROUP BY call_type
+    ''').fetchall()
+    conn.close()
+    return jsonify([dict(row) for row in rows])
+
 # === ROLLER ===
 
 @app.route('/api/roles', methods=['GET'])
@@ -174,15 +287,30 @@ def delete_role(role_id):
     conn.close()
     return jsonify({"success": True})
 
+@app.route('/api/roles/<int:role_id>/close', methods=['POST'])
+def close_role(role_id):
+    data = request.get_json(silent=True) or {}
+    closed = 1 if data.get('closed', True) else 0
+
+    conn = get_db()
+    conn.execute('UPDATE roles SET closed = ? WHERE id = ?', (closed, role_id))
+    conn.commit()
+    conn.close()
+    return jsonify({"success": True, "closed": bool(closed)})
+
 # === KANDIDATER ===
 
 @app.route('/api/candidates', methods=['GET'])
 def get_candidates():
+    include_archived = request.args.get('include_archived') == '1'
+
     conn = get_db()
-    candidates = conn.execute('''
-        SELECT c.*, r.name as role_name
+    candidates = conn.execute(f'''
+        SELECT c.id, c.name, c.role_id, c.total_score, c.interview_date, c.created_at,
+               c.archived, r.name as role_name
         FROM candidates c
         LEFT JOIN roles r ON c.role_id = r.id
+        {'' if include_archived else 'WHERE c.archived = 0'}
         ORDER BY c.total_score DESC, c.created_at DESC
     ''').fetchall()
     conn.close()
@@ -202,7 +330,7 @@ def get_candidate(candidate_id):
     if not candidate:
         return jsonify({"error": "Kandidat hittades inte"}), 404
 
-    candidate_dict = dict(candidate)
+    candidate_dict = load_candidate_fields(candidate)
     if candidate_dict['analysis']:
         candidate_dict['analysis'] = json.loads(candidate_dict['analysis'])
     if candidate_dict['all_questions']:
@@ -216,8 +344,98 @@ def get_candidate(candidate_id):
 def delete_candidate(candidate_id):
     conn = get_db()
     conn.execute('DELETE FROM candidates WHERE id = ?', (candidate_id,))
+    remove_from_index(conn, candidate_id)
     conn.commit()
     conn.close()
+    delete_archived(candidate_id)
+    return jsonify({"success": True})
+
+def load_candidate_fields(candidate):
+    """Packa upp kandidatens tunga fält, från arkivet om kandidaten är arkiverad"""
+    candidate_dict = dict(candidate)
+    if candidate_dict.get('archived'):
+        archived_fields = get_archived_fields(candidate_dict['id'])
+        if archived_fields:
+            candidate_dict.update(archived_fields)
+    return decompress_row(candidate_dict)
+
+def describe_similar(conn, matches):
+    """Komplettera (id, likhet)-par med namn och roll"""
+    if not matches:
+        return []
+    similarity = dict(matches)
+    placeholders = ', '.join('?' for _ in matches)
+    rows = conn.execute(f'''
+        SELECT c.id, c.name, c.role_id, c.total_score, c.interview_date, c.archived,
+               r.name as role_name
+        FROM candidates c
+        LEFT JOIN roles r ON c.role_id = r.id
+        WHERE c.id IN ({placeholders})
+    ''', list(similarity)).fetchall()
+    result = [dict(row, similarity=round(similarity[row['id']], 3)) for row in rows]
+    result.sort(key=lambda row: row['similarity'], reverse=True)
+    return result
+
+@app.route('/api/candidates/<int:candidate_id>/similar', methods=['GET'])
+def get_similar_candidates(candidate_id):
+    threshold = request.args.get('threshold', type=float)
+
+    conn = get_db()
+    row = conn.execute('SELECT signature FROM cv_minhash WHERE candidate_id = ?',
+                       (candidate_id,)).fetchone()
+    if not row:
+        exists = conn.execute('SELECT 1 FROM candidates WHERE id = ?', (candidate_id,)).fetchone()
+        conn.close()
+        if not exists:
+            return jsonify({"error": "Kandidat hittades inte"}), 404
+        return jsonify([])
+
+    kwargs = {'threshold': threshold} if threshold is not None else {}
+    matches = find_similar(conn, unpack_signature(row['signature']), exclude_id=candidate_id, **kwargs)
+    similar = describe_similar(conn, matches)
+    conn.close()
+    return jsonify(similar)
+
+# === ARKIV ===
+
+@app.route('/api/archive', methods=['POST'])
+def run_archive():
+    data = request.get_json(silent=True) or {}
+    older_than_days = data.get('older_than_days')
+    closed_roles = data.get('closed_roles', True)
+
+    if older_than_days is not None and (
+            isinstance(older_than_days, bool) or not isinstance(older_than_days, int)
+            or older_than_days < 0):
+        return jsonify({"error": "older_than_days måste vara ett heltal som är 0 eller större"}), 400
+    if not isinstance(closed_roles, bool):
+        return jsonify({"error": "closed_roles måste vara true eller false"}), 400
+
+    conn = get_db()
+    archived = archive_candidates(conn, older_than_days, closed_roles)
+    conn.close()
+
+    if archived:
+        threading.Thread(
+            target=incremental_vacuum, args=([DB_PATH, ARCHIVE_DB_PATH],), daemon=True
+        ).start()
+
+    return jsonify({"archived": archived})
+
+@app.route('/api/archive/candidates', methods=['GET'])
+def get_archived_candidates():
+    query = request.args.get('q', '')
+    role_id = request.args.get('role_id', type=int)
+    return jsonify(search_archive(query, role_id))
+
+@app.route('/api/archive/candidates/<int:candidate_id>/restore', methods=['POST'])
+def restore_archived_candidate(candidate_id):
+    conn = get_db()
+    restored = restore_candidate(conn, candidate_id)
+    conn.close()
+
+    if not restored:
+        return jsonify({"error": "Kandidat hittades inte i arkivet"}), 404
     return jsonify({"success": True})
 
 # === CV UPLOAD & PERSONAL QUESTIONS ===
@@ -256,8 +474,56 @@ def generate_personal_questions():
     if not cv_text:
         return jsonify({"error": "CV-text krävs"}), 400
 
-    questions = generate_cv_questions(cv_text, role_name, role_description)
-    return jsonify({"questions": questions})
+    # Återanvänd frågorna från en tidigare kandidat till samma roll med
+    # nästan samma CV istället för att göra ett nytt Claude-anrop
+    previous = None if data.get('force_new') else find_previous_questions(cv_text, data.get('role_id'))
+    if previous and data.get('role_id') is not None and previous[1]['role_id'] == data.get('role_id'):
+        questions, similar_candidate = previous
+        return jsonify({"questions": questions, "similar_candidate": similar_candidate})
+
+    role_questions = []
+    if data.get('role_id') is not None:
+        conn = get_db()
+        role = conn.execute('SELECT questions FROM roles WHERE id = ?', (data.get('role_id'),)).fetchone()
+        conn.close()
+        if role and role['questions']:
+            role_questions = json.loads(role['questions'])
+
+    questions = generate_cv_questions(cv_text, role_name, role_description, role_questions)
+    result = {"questions": questions}
+    # Frågor från en annan roll passar inte nödvändigtvis – visa dem bara som förslag
+    if previous:
+        questions_from_other_role, similar_candidate = previous
+        result["suggestion"] = {"questions": questions_from_other_role, "similar_candidate": similar_candidate}
+    return jsonify(result)
+
+def find_previous_questions(cv_text, role_id=None):
+    """Hitta personliga frågor från en kandidat med nära dubblett av CV:t.
+
+    Kandidater till samma roll föredras framför högre likhet i en annan roll.
+    Reservfrågorna från ett misslyckat Claude-anrop återanvänds aldrig."""
+    conn = get_db()
+    matches = find_similar(conn, minhash_signature(cv_text))
+    similar = describe_similar(conn, matches)
+    similar.sort(key=lambda candidate: role_id is None or candidate['role_id'] != role_id)
+    for candidate in similar:
+        row = conn.execute('SELECT personal_questions FROM candidates WHERE id = ?',
+                           (candidate['id'],)).fetchone()
+        personal_questions = row['personal_questions'] if row else None
+        if personal_questions is None and candidate['archived']:
+            archived_fields = get_archived_fields(candidate['id']) or {}
+            personal_questions = archived_fields.get('personal_questions')
+        questions = json.loads(personal_questions) if personal_questions else []
+        if questions and not is_fallback_questions(questions):
+            conn.close()
+            return questions, candidate
+    conn.close()
+    return None
+
+def is_fallback_questions(questions):
+    """Avgör om frågorna är reservfrågorna från generate_cv_questions"""
+    fallback = {question['question'] for question in CV_FALLBACK_QUESTIONS}
+    return {question.get('question') for question in questions} <= fallback
 
 # === INTERVJU & ANALYS ===
 
@@ -286,10 +552,11 @@ def prepare_candidate():
     cursor = conn.execute(
         '''INSERT INTO candidates (role_id, cv_text, personal_questions, all_questions)
            VALUES (?, ?, ?, ?)''',
-        (role_id, cv_text, json.dumps(personal_questions, ensure_ascii=False),
+        (role_id, compress_text(cv_text), json.dumps(personal_questions, ensure_ascii=False),
          json.dumps(all_questions, ensure_ascii=False))
     )
     candidate_id = cursor.lastrowid
+    index_cv(conn, candidate_id, cv_text)
     conn.commit()
     conn.close()
 
@@ -359,7 +626,8 @@ def analyze_interview():
 
     conn = get_db()
     candidate = conn.execute(
-        'SELECT c.*, r.name as role_name FROM candidates c JOIN roles r ON c.role_id = r.id WHERE c.id = ?',
+        '''SELECT c.all_questions, c.personal_questions, c.archived, r.name as role_name
+           FROM candidates c JOIN roles r ON c.role_id = r.id WHERE c.id = ?''',
         (candidate_id,)
     ).fetchone()
 
@@ -367,10 +635,19 @@ def analyze_interview():
         conn.close()
         return jsonify({"error": "Kandidat hittades inte"}), 404
 
+    if candidate['archived']:
+        conn.close()
+        return jsonify({"error": "Kandidaten är arkiverad och måste återställas först"}), 409
+
     all_questions = json.loads(candidate['all_questions'])
+    personal_questions = json.loads(candidate['personal_questions']) if candidate['personal_questions'] else []
+
+    # all_questions är rollens frågor följda av de personliga frågorna
+    role_questions = all_questions[:len(all_questions) - len(personal_questions)]
+    personal_questions = all_questions[len(role_questions):]
 
     # Analysera med Claude
-    analysis = analyze_with_claude(all_questions, transcript, candidate['role_name'])
+    analysis = analyze_with_claude(role_questions, personal_questions, transcript, candidate['role_name'])
 
     # Beräkna totalpoäng
     total_score = sum(q.get('score', 0) for q in analysis.get('questions', []))
@@ -380,7 +657,8 @@ def analyze_interview():
         '''UPDATE candidates SET
            name = ?, transcript = ?, analysis = ?, total_score = ?, interview_date = ?
            WHERE id = ?''',
-        (candidate_name, transcript, json.dumps(analysis, ensure_ascii=False),
+        (candidate_name, compress_text(transcript),
+         compress_text(json.dumps(analysis, ensure_ascii=False)),
          total_score, datetime.now().isoformat(), candidate_id)
     )
     conn.commit()
@@ -415,7 +693,7 @@ def generate_report(candidate_id):
     if not candidate:
         return jsonify({"error": "Kandidat hittades inte"}), 404
 
-    candidate_dict = dict(candidate)
+    candidate_dict = load_candidate_fields(candidate)
     analysis = json.loads(candidate_dict['analysis']) if candidate_dict['analysis'] else {}
 
     if report_format == 'pdf':
@@ -574,6 +852,188 @@ def generate_pdf_report(candidate_dict, analysis, comments):
 
 # === AI-FUNKTIONER ===
 
+CLAUDE_MODEL = "claude-sonnet-4-20250514"
+
+# Anthropic cachar bara prefix på minst 1024 tokens för Sonnet-modellerna.
+# Kortare prefix med cache_control skickas utan fel men cachas aldrig.
+
+# Instruktionerna till intervjuanalysen är lika för alla analyser och skickas
+# som första, cachebara systemblock
+ANALYSIS_INSTRUCTIONS = """Du är en expert på rekrytering och ska analysera en intervju. Du får rollens intervjufrågor, kandidatens personliga frågor och en transkription av intervjun. Transkriptionen är maskinellt framtagen från en ljudinspelning och saknar ofta talarmarkeringar, skiljetecken och styckeindelning.
+
+UPPGIFT:
+1. Matcha kandidatens svar till rätt frågor (svaren kan komma i annan ordning)
+2. Bedöm varje svar på skala 1-5:
+   - 5: Exceptionellt - djup förståelse, konkreta exempel, strategiskt tänkande
+   - 4: Starkt - tydlig kompetens, relevanta exempel
+   - 3: Acceptabelt - grundläggande förståelse, saknar djup
+   - 2: Svagt - vag eller bristfällig
+   - 1: Mycket svagt - ingen relevant förståelse
+
+MATCHNING AV SVAR:
+- Skilj på intervjuarens och kandidatens repliker utifrån sammanhanget. Intervjuaren läser oftast upp frågorna ordagrant eller nästan ordagrant.
+- Ett svar kan vara uppdelat på flera ställen i intervjun, till exempel när kandidaten återkommer till en tidigare fråga. Väg då samman alla delar.
+- Om kandidaten i ett och samma svar berör flera frågor, använd den del som hör till respektive fråga.
+- Följdfrågor från intervjuaren räknas till den fråga de fördjupar.
+- Om en fråga inte ställdes eller inte besvarades, ge poäng 1, skriv "Frågan besvarades inte i intervjun" som sammanfattning och lämna citatet tomt.
+
+BEDÖMNINGSPRINCIPER:
+- Bedöm endast det kandidaten faktiskt säger i intervjun. Gissa inte och hämta inte information utanför transkriptionen.
+- Konkreta exempel väger tyngre än allmänna påståenden. Ett bra exempel beskriver situationen, kandidatens egen uppgift, vad kandidaten gjorde och vilket resultat det gav.
+- Längd är inte kvalitet. Ett kort, precist svar med ett tydligt exempel kan vara värt mer än ett långt och allmänt hållet svar.
+- Bedöm svaret i relation till rollen. Ett tekniskt djupt svar är mer värt för en teknisk roll än för en säljroll, och tvärtom.
+- Ta inte hänsyn till språkfel, talspråk, dialekt, tvekljud eller transkriptionsfel. De säger ingenting om kandidatens kompetens.
+- Låt inte kön, ålder, etnicitet, namn eller andra personliga egenskaper påverka bedömningen.
+- Använd hela skalan. Poäng 5 ska vara ovanligt men möjligt, och poäng 3 är ett godkänt men inte utmärkande svar.
+- Varje fråga bedöms för sig. Låt inte ett starkt eller svagt svar färga bedömningen av övriga frågor.
+
+VÄGLEDNING PER POÄNGNIVÅ:
+- 5: Kandidaten ger flera konkreta och relevanta exempel, visar egen reflektion över vad som fungerade och inte, kopplar svaret till verksamhetens mål och resonerar om konsekvenser på längre sikt.
+- 4: Kandidaten ger minst ett konkret exempel med tydlig egen roll och resultat, och svaret är relevant för rollen, men reflektionen eller helhetsperspektivet är begränsat.
+- 3: Kandidaten visar att hen förstår frågan och ger ett rimligt svar, men exemplen är allmänna, saknar resultat eller beskriver främst vad gruppen gjorde.
+- 2: Svaret är vagt, går delvis förbi frågan eller består mest av allmänna påståenden utan stöd i erfarenhet.
+- 1: Svaret saknar relevans för frågan, visar på missförstånd av området eller så besvarades frågan inte alls.
+
+SAMMANFATTNING, MOTIVERING OCH CITAT:
+- "summary" beskriver kort och neutralt vad kandidaten sa, utan värdering.
+- "assessment" motiverar poängen med hänvisning till principerna ovan och nämner vad som hade krävts för en högre poäng.
+- "quote" är ett ordagrant citat ur transkriptionen på högst 20 ord som visar kärnan i svaret. Hitta inte på och skriv inte om citat. Lämna fältet tomt om inget passande citat finns.
+- "overall_assessment" väger samman hela intervjun i 3-4 meningar och lyfter fram kandidatens tydligaste styrkor och utvecklingsområden i förhållande till rollen.
+- "summarized_transcript" är en löpande sammanfattning av intervjuns innehåll i den ordning det togs upp, högst 200 ord.
+
+Svara med JSON i exakt detta format:
+{
+  "overall_assessment": "3-4 meningars övergripande bedömning av kandidaten",
+  "summarized_transcript": "Sammanfattning av hela intervjun (max 200 ord)",
+  "questions": [
+    {
+      "question": "Frågetexten",
+      "score": 4,
+      "summary": "Kort sammanfattning av svaret",
+      "assessment": "Motivering till poängen",
+      "quote": "Ett kort citat från kandidaten (max 20 ord)"
+    }
+  ]
+}
+
+Frågorna i "questions" ska komma i samma ordning som i frågelistan och frågetexten ska återges oförändrad. Inkludera alla frågor i svaret och svara ENDAST med JSON, inget annat."""
+
+CV_QUESTION_INSTRUCTIONS = """Du är en expert på rekrytering. Du ska analysera ett CV och generera 4 personliga intervjufrågor för rollen som anges nedan.
+
+SYFTE:
+De personliga frågorna kompletterar rollens standardfrågor, som listas under rollen när de finns. Standardfrågorna ställs till alla kandidater. De personliga frågorna ska ge intervjuaren underlag som standardfrågorna inte ger, genom att fördjupa det som är specifikt för just den här kandidatens bakgrund.
+
+Generera 4 specifika frågor baserade på:
+- Kandidatens tidigare erfarenheter
+- Luckor eller intressanta punkter i CV:t
+- Hur kandidatens bakgrund matchar rollen
+- Specifika projekt eller prestationer att fördjupa
+
+Låt helst varje fråga täcka en av punkterna ovan. Om CV:t saknar underlag för en punkt, lägg frågan på den punkt där CV:t ger mest att fördjupa.
+
+HUR EN BRA FRÅGA SER UT:
+- Knyt frågan till något konkret i CV:t, till exempel en arbetsgivare, ett projekt, en period eller en teknik, så att kandidaten förstår exakt vad som avses.
+- Ställ öppna frågor som börjar med till exempel "Berätta om", "Beskriv" eller "Hur". Undvik frågor som kan besvaras med ja eller nej.
+- Fråga om en sak i taget. Dela inte in frågan i flera delfrågor.
+- Be om exempel där kandidaten beskriver sin egen roll, vad hen faktiskt gjorde och vilket resultat det gav. Sådana svar går att bedöma på intervjuns poängskala 1-5.
+- Håll frågan kort, en till två meningar och högst omkring 40 ord, så att den är lätt att läsa upp.
+- Formulera frågan neutralt. Undvik ledande frågor som antyder vilket svar som förväntas.
+
+LUCKOR OCH BYTEN:
+- Fråga om luckor i CV:t neutralt och nyfiket, utan att anta någon orsak. Fråga till exempel vad kandidaten gjorde under perioden snarare än varför hen inte arbetade.
+- Vid flera korta anställningar, fråga vad kandidaten tog med sig från dem eller vad som avgjorde bytena, inte om kandidaten har svårt att stanna.
+- Vid byte av bransch eller yrkesroll, fråga hur erfarenheterna från den tidigare banan kan användas i den sökta rollen.
+
+FRÅGOR SOM INTE FÅR STÄLLAS:
+Ställ inga frågor om ålder, föräldraskap eller familjeplanering, hälsa eller funktionsnedsättning, religion, etnisk tillhörighet, sexuell läggning, könsidentitet, politiska åsikter eller fackligt medlemskap. Det gäller även när CV:t nämner något av detta, till exempel föräldraledighet eller ett ideellt uppdrag i en trosgemenskap. Fråga i så fall om de erfarenheter och färdigheter uppdraget gav, inte om själva omständigheten.
+
+UNDVIK:
+- Frågor som redan täcks av rollens standardfrågor.
+- Generiska frågor som kunde ställas till vem som helst, till exempel var kandidaten ser sig själv om fem år.
+- Frågor om uppgifter som inte finns i CV:t, och påståenden om kandidaten som CV:t inte stöder.
+- Hypotetiska frågor när det finns verkliga erfarenheter i CV:t att fråga om.
+
+EXEMPEL:
+- Bra: "Du ledde migreringen av orderhanteringen till molnet på Företaget AB 2021. Beskriv vilka beslut du själv fattade och vad resultatet blev."
+  Knuten till CV:t, öppen, ber om egen roll och resultat.
+- Dåligt: "Har du erfarenhet av molnet?"
+  Ja/nej-fråga som inte använder något från CV:t.
+- Bra: "Mellan 2019 och 2020 står det ingen anställning i ditt CV. Vad gjorde du under den perioden som är relevant för den här rollen?"
+  Neutral fråga om en lucka som kopplas till rollen.
+- Dåligt: "Varför var du arbetslös 2019?"
+  Antar en orsak och är laddad.
+- Bra: "Du har arbetat både som säljare och som projektledare. Hur har erfarenheten från försäljning påverkat hur du leder projekt?"
+  Fördjupar ett byte av yrkesroll och kopplar till rollen.
+- Dåligt: "Berätta om dig själv och dina styrkor och svagheter och varför du söker jobbet."
+  Generisk och flerledad.
+
+OM CV:T ÄR KORT ELLER SVÅRLÄST:
+CV-texten är ofta maskinellt utläst ur en PDF- eller Word-fil och kan sakna radbrytningar eller ha kolumner i fel ordning. Tolka innehållet så gott det går. Om CV:t är mycket kort, bygg frågorna på det som finns och på hur bakgrunden förhåller sig till rollbeskrivningen.
+
+Använd alltid kategorin "Personlig".
+
+Svara ENDAST med en JSON-array med 4 objekt:
+[
+  {"category": "Personlig", "question": "Din fråga här..."},
+  ...
+]
+
+Svara ENDAST med JSON-arrayen, inget annat."""
+
+# Används när Claude-anropet misslyckas; återanvänds aldrig för andra kandidater
+CV_FALLBACK_QUESTIONS = [
+    {"category": "Personlig", "question": "Berätta mer om din senaste arbetsplats och vad du lärde dig där."},
+    {"category": "Personlig", "question": "Vad motiverade dig att söka denna tjänst?"},
+    {"category": "Personlig", "question": "Vilken är din största professionella prestation?"},
+    {"category": "Personlig", "question": "Var ser du dig själv om 5 år?"}
+]
+
+def cached_block(text):
+    """Textblock markerat för Anthropics prompt-cache"""
+    return {"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}
+
+def create_claude_message(call_type, **kwargs):
+    """Anropa Claude och logga tokenförbrukning inklusive cache-läsning/skrivning.
+
+    Svaret strömmas så att tiden till första token kan mätas."""
+    start = time.monotonic()
+    ttft_ms = None
+    with anthropic_client.messages.stream(model=CLAUDE_MODEL, **kwargs) as stream:
+        for _ in stream.text_stream:
+            if ttft_ms is None:
+                ttft_ms = int((time.monotonic() - start) * 1000)
+        response = stream.get_final_message()
+    duration_ms = int((time.monotonic() - start) * 1000)
+
+    usage = response.usage
+    record = (
+        call_type,
+        CLAUDE_MODEL,
+        getattr(usage, 'input_tokens', 0) or 0,
+        getattr(usage, 'output_tokens', 0) or 0,
+        getattr(usage, 'cache_creation_input_tokens', 0) or 0,
+        getattr(usage, 'cache_read_input_tokens', 0) or 0,
+        ttft_ms,
+        duration_ms
+    )
+    print(f"Claude [{call_type}]: input={record[2]} output={record[3]} "
+          f"cache_write={record[4]} cache_read={record[5]} ttft={ttft_ms}ms tid={duration_ms}ms")
+
+    try:
+        conn = get_db()
+        conn.execute(
+            '''INSERT INTO api_usage (call_type, model, input_tokens, output_tokens,
+               cache_creation_input_tokens, cache_read_input_tokens, ttft_ms, duration_ms)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+            record
+        )
+        conn.commit()
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"Kunde inte spara tokenförbrukning: {e}")
+
+    return response
+
 def generate_role_questions(role_name, role_description):
     """Generera 6 intervjufrågor baserat på roll"""
 
@@ -603,8 +1063,8 @@ Exempel på format:
 Svara ENDAST med JSON-arrayen, inget annat."""
 
     try:
-        response = anthropic_client.messages.create(
-            model="claude-sonnet-4-20250514",
+        response = create_claude_message(
+            'role_questions',
             max_tokens=2000,
             messages=[{"role": "user", "content": prompt}]
         )
@@ -631,36 +1091,28 @@ Svara ENDAST med JSON-arrayen, inget annat."""
             {"category": "Hållbarhet", "question": "Hur ser du på hållbarhet och miljöpåverkan i arbetet?"}
         ]
 
-def generate_cv_questions(cv_text, role_name, role_description):
+def generate_cv_questions(cv_text, role_name, role_description, role_questions=None):
     """Generera 4 personliga frågor baserat på CV"""
 
-    prompt = f"""Du är en expert på rekrytering. Analysera detta CV och generera 4 personliga intervjufrågor.
-
-Roll: {role_name}
+    # Instruktionerna är lika för alla kandidater och rollen lika för alla
+    # kandidater till samma roll. Båda skickas som cachebara systemblock
+    # före CV:t, som är det enda som varierar.
+    role_questions_text = "\n".join([f"- {q.get('question', '')}" for q in role_questions or []])
+    role_block = f"""Roll: {role_name}
 Rollbeskrivning: {role_description if role_description else "Ej angiven"}
 
-CV:
-{cv_text[:5000]}
+Rollens standardfrågor:
+{role_questions_text if role_questions_text else "Inga angivna"}"""
 
-Generera 4 specifika frågor baserade på:
-- Kandidatens tidigare erfarenheter
-- Luckor eller intressanta punkter i CV:t
-- Hur kandidatens bakgrund matchar rollen
-- Specifika projekt eller prestationer att fördjupa
-
-Svara ENDAST med en JSON-array med 4 objekt:
-[
-  {{"category": "Personlig", "question": "Din fråga här..."}},
-  ...
-]
-
-Svara ENDAST med JSON-arrayen, inget annat."""
+    content = f"""CV:
+{cv_text[:5000]}"""
 
     try:
-        response = anthropic_client.messages.create(
-            model="claude-sonnet-4-20250514",
+        response = create_claude_message(
+            'cv_questions',
             max_tokens=1500,
-            messages=[{"role": "user", "content": prompt}]
+            system=[cached_block(CV_QUESTION_INSTRUCTIONS), cached_block(role_block)],
+            messages=[{"role": "user", "content": content}]
         )
 
         response_text = response.content[0].text.strip()
@@ -674,60 +1126,45 @@ Svara ENDAST med JSON-arrayen, inget annat."""
 
     except Exception as e:
         print(f"Fel vid generering av CV-frågor: {e}")
-        return [
-            {"category": "Personlig", "question": "Berätta mer om din senaste arbetsplats och vad du lärde dig där."},
-            {"category": "Personlig", "question": "Vad motiverade dig att söka denna tjänst?"},
-            {"category": "Personlig", "question": "Vilken är din största professionella prestation?"},
-            {"category": "Personlig", "question": "Var ser du dig själv om 5 år?"}
-        ]
+        return [dict(question) for question in CV_FALLBACK_QUESTIONS]
 
-def analyze_with_claude(questions, transcript, role_name):
+def analyze_with_claude(role_questions, personal_questions, transcript, role_name):
     """Analysera intervju med Claude"""
 
-    questions_text = "\n".join([f"{i+1}. [{q.get('category', '')}] {q.get('question', '')}"
-                                 for i, q in enumerate(questions)])
-
-    prompt = f"""Du är en expert på rekrytering och ska analysera en intervju för rollen "{role_name}".
+    questions = role_questions + personal_questions
 
-INTERVJUFRÅGOR:
-{questions_text}
+    def numbered(items, start):
+        return "\n".join([f"{i}. [{q.get('category', '')}] {q.get('question', '')}"
+                          for i, q in enumerate(items, start)])
 
-TRANSKRIPTION AV INTERVJUN:
-{transcript}
+    # Prompten delas i ett stabilt prefix och en variabel del. Cachebrytpunkter
+    # sätts efter instruktionerna (lika för alla analyser) och efter rollens
+    # frågor (lika för alla kandidater till rollen). Kandidatens personliga
+    # frågor och transkriptionen skiljer sig mellan kandidater och skickas sist.
+    role_block = f"""ROLL: "{role_name}"
 
-UPPGIFT:
-1. Matcha kandidatens svar till rätt frågor (svaren kan komma i annan ordning)
-2. Bedöm varje svar på skala 1-5:
-   - 5: Exceptionellt - djup förståelse, konkreta exempel, strategiskt tänkande
-   - 4: Starkt - tydlig kompetens, relevanta exempel
-   - 3: Acceptabelt - grundläggande förståelse, saknar djup
-   - 2: Svagt - vag eller bristfällig
-   - 1: Mycket svagt - ingen relevant förståelse
+ROLLENS INTERVJUFRÅGOR:
+{numbered(role_questions, 1)}"""
 
-Svara med JSON i exakt detta format:
-{{
-  "overall_assessment": "3-4 meningars övergripande bedömning av kandidaten",
-  "summarized_transcript": "Sammanfattning av hela intervjun (max 200 ord)",
-  "questions": [
-    {{
-      "question": "Frågetexten",
-      "score": 4,
-      "summary": "Kort sammanfattning av svaret",
-      "assessment": "Motivering till poängen",
-      "quote": "Ett kort citat från kandidaten (max 20 ord)"
-    }}
-  ]
-}}
+    candidate_block = f"""PERSONLIGA FRÅGOR TILL KANDIDATEN:
+{numbered(personal_questions, len(role_questions) + 1) if personal_questions else "Inga personliga frågor."}
 
 VIKTIGT:
-- Inkludera alla {len(questions)} frågor i svaret
-- Svara ENDAST med JSON, inget annat"""
+- Inkludera alla {len(questions)} frågor i svaret, i ordningen ovan
+- Svara ENDAST med JSON, inget annat
+
+TRANSKRIPTION AV INTERVJUN:
+{transcript}"""
 
     try:
-        response = anthropic_client.messages.create(
-            model="claude-sonnet-4-20250514",
+        response = create_claude_message(
+            'analysis',
             max_tokens=4000,
-            messages=[{"role": "user", "content": prompt}]
+            system=[cached_block(ANALYSIS_INSTRUCTIONS)],
+            messages=[{"role": "user", "content": [
+                cached_block(role_block),
+                {"type": "text", "text": candidate_block}
+            ]}]
         )
 
         response_text = response.content[0].text.strip()
@@ -751,13 +1188,40 @@ VIKTIGT:
 @app.route('/')
 @app.route('/<path:path>')
 def serve_frontend(path=''):
-    """Servera React-appen om build-mappen finns"""
-    if path and os.path.exists(os.path.join(FRONTEND_BUILD, path)):
-        return app.send_static_file(path)
-    index_path = os.path.join(FRONTEND_BUILD, 'index.html')
-    if os.path.exists(index_path):
-        return app.send_static_file('index.html')
-    return jsonify({"message": "Backend körs! Kör 'npm run build' i frontend-mappen för att aktivera webbgränssnittet."}), 200
+    """Servera React-appen från manifestet med förkomprimerade varianter och cache-headers"""
+    # Nya builds plockas upp av watch_frontend_build; en miss läser inte från disk
+    entry = STATIC_MANIFEST.get(path) or STATIC_MANIFEST.get('index.html')
+    if not entry:
+        return jsonify({"message": "Backend körs! Kör 'npm run build' i frontend-mappen för att aktivera webbgränssnittet."}), 200
+
+    try:
+        return frontend_file_response(entry)
+    except FileNotFoundError:
+        # Build-mappen har bytts ut sedan manifestet lästes in
+        reload_manifest_if_changed(force=True)
+        entry = STATIC_MANIFEST.get(path) or STATIC_MANIFEST.get('index.html')
+        if not entry:
+            return jsonify({"error": "Filen hittades inte"}), 404
+        try:
+            return frontend_file_response(entry)
+        except FileNotFoundError:
+            return jsonify({"error": "Filen hittades inte"}), 404
+
+def frontend_file_response(entry):
+    encoding, file_path = choose_variant(entry, request.accept_encodings)
+    etag = f"{entry['etag']}-{encoding}" if encoding else entry['etag']
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = send_file(file_path, mimetype=entry['mimetype'], conditional=False, etag=False)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = entry['cache_control']
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
 if __name__ == '__main__':
     print("Startar backend på http://localhost:5000")
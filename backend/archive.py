@@ -0,0 +1,156 @@
+import os
+import sqlite3
+
+ARCHIVE_DB_PATH = os.getenv('ARCHIVE_DB_PATH',
+                            os.path.join(os.path.dirname(__file__), 'rekrytering_archive.db'))
+
+# Kandidater äldre än så här flyttas till arkivet om inget annat anges
+DEFAULT_ARCHIVE_AFTER_DAYS = 365
+
+# Fält som flyttas till arkivet och nollställs i den varma tabellen
+HEAVY_COLUMNS = ('cv_text', 'personal_questions', 'all_questions', 'transcript', 'analysis')
+
+CANDIDATE_COLUMNS = ('id', 'name', 'role_id') + HEAVY_COLUMNS + (
+    'total_score', 'interview_date', 'created_at')
+
+def init_archive_db():
+    conn = sqlite3.connect(ARCHIVE_DB_PATH)
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    conn.execute('''CREATE TABLE IF NOT EXISTS candidates (
+        id INTEGER PRIMARY KEY,
+        name TEXT,
+        role_id INTEGER,
+        role_name TEXT,
+        cv_text BLOB,
+        personal_questions TEXT,
+        all_questions TEXT,
+        transcript BLOB,
+        analysis BLOB,
+        total_score INTEGER,
+        interview_date TIMESTAMP,
+        created_at TIMESTAMP,
+        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_archive_name ON candidates (name)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_archive_role ON candidates (role_id)')
+    conn.commit()
+    conn.close()
+
+def attach_archive(conn):
+    """Koppla arkivdatabasen till en anslutning som schemat 'archive'"""
+    conn.execute('ATTACH DATABASE ? AS archive', (ARCHIVE_DB_PATH,))
+
+def archive_candidates(conn, older_than_days=None, closed_roles=True):
+    """Flytta gamla kandidater och kandidater i stängda roller till arkivet.
+
+    En kompakt sammanfattningsrad (namn, roll, poäng, datum) blir kvar i den
+    varma tabellen med archived = 1. En kandidat som återställts räknar sin
+    ålder från återställningen och arkiveras inte för att rollen är stängd.
+    Returnerar antalet arkiverade kandidater."""
+    if older_than_days is None:
+        # Läses vid anropet så att värdet från .env hinner laddas
+        older_than_days = int(os.getenv('ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS))
+
+    conditions = ["COALESCE(c.restored_at, c.created_at) < datetime('now', ?)"]
+    params = [f'-{int(older_than_days)} days']
+    if closed_roles:
+        conditions.append('(r.closed = 1 AND c.restored_at IS NULL)')
+
+    ids = [row[0] for row in conn.execute(f'''
+        SELECT c.id FROM candidates c
+        LEFT JOIN roles r ON c.role_id = r.id
+        WHERE c.archived = 0 AND ({' OR '.join(conditions)})
+    ''', params).fetchall()]
+    if not ids:
+        return 0
+
+    columns = ', '.join(CANDIDATE_COLUMNS)
+    selected = ', '.join(f'c.{column}' for column in CANDIDATE_COLUMNS)
+    cleared = ', '.join(f'{column} = NULL' for column in HEAVY_COLUMNS)
+    placeholders = ', '.join('?' for _ in ids)
+
+    attach_archive(conn)
+    try:
+        conn.execute(f'''
+            INSERT OR REPLACE INTO archive.candidates ({columns}, role_name)
+            SELECT {selected}, r.name
+            FROM main.candidates c
+            LEFT JOIN main.roles r ON c.role_id = r.id
+            WHERE c.id IN ({placeholders})
+        ''', ids)
+        conn.execute(
+            f'UPDATE main.candidates SET {cleared}, archived = 1 WHERE id IN ({placeholders})',
+            ids
+        )
+        conn.commit()
+    finally:
+        conn.execute('DETACH DATABASE archive')
+    return len(ids)
+
+def search_archive(query='', role_id=None, limit=100):
+    """Sök bland arkiverade kandidater på namn eller rollnamn"""
+    conn = sqlite3.connect(ARCHIVE_DB_PATH)
+    conn.row_factory = sqlite3.Row
+    sql = '''SELECT id, name, role_id, role_name, total_score, interview_date,
+                    created_at, archived_at
+             FROM candidates WHERE 1 = 1'''
+    params = []
+    if query:
+        sql += ' AND (name LIKE ? OR role_name LIKE ?)'
+        params += [f'%{query}%', f'%{query}%']
+    if role_id is not None:
+        sql += ' AND role_id = ?'
+        params.append(role_id)
+    sql += ' ORDER BY archived_at DESC LIMIT ?'
+    params.append(limit)
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+def get_archived_fields(candidate_id):
+    """Hämta de tunga fälten för en arkiverad kandidat (None om den saknas)"""
+    conn = sqlite3.connect(ARCHIVE_DB_PATH)
+    conn.row_factory = sqlite3.Row
+    row = conn.execute(
+        f"SELECT {', '.join(HEAVY_COLUMNS)} FROM candidates WHERE id = ?",
+        (candidate_id,)
+    ).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+def restore_candidate(conn, candidate_id):
+    """Flytta tillbaka en kandidat från arkivet. Returnerar False om den saknas."""
+    columns = ', '.join(CANDIDATE_COLUMNS)
+    attach_archive(conn)
+    try:
+        cursor = conn.execute(f'''
+            INSERT OR REPLACE INTO main.candidates ({columns}, archived)
+            SELECT {columns}, 0 FROM archive.candidates WHERE id = ?
+        ''', (candidate_id,))
+        if cursor.rowcount == 0:
+            conn.rollback()
+            return False
+        conn.execute('UPDATE main.candidates SET restored_at = CURRENT_TIMESTAMP WHERE id = ?',
+                     (candidate_id,))
+        conn.execute('DELETE FROM archive.candidates WHERE id = ?', (candidate_id,))
+        conn.commit()
+        return True
+    finally:
+        conn.execute('DETACH DATABASE archive')
+
+def delete_archived(candidate_id):
+    conn = sqlite3.connect(ARCHIVE_DB_PATH)
+    conn.execute('DELETE FROM candidates WHERE id = ?', (candidate_id,))
+    conn.commit()
+    conn.close()
+
+def incremental_vacuum(db_paths, pages=0):
+    """Frigör sidor som lämnats tomma efter arkivering (0 = alla lediga sidor)"""
+    for path in db_paths:
+        try:
+            conn = sqlite3.connect(path, timeout=30)
+            # executescript stegar PRAGMA-satsen till slut; execute() frigör bara en sida
+            conn.executescript(f'PRAGMA incremental_vacuum({int(pages)})')
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"Incremental vacuum misslyckades för {path}: {e}")
@@ -0,0 +1,70 @@
+"""Visa prompt-cachningen i analyze_with_claude mot den lokala mocken.
+
+Kör: python bench_prompt_cache.py
+
+Tre intervjuer för samma roll analyseras efter varandra, med olika
+personliga frågor och transkriptioner per kandidat. Det delade prefixet
+(instruktioner och rollens frågor) skrivs till cachen av första anropet och
+läses av de följande, vilket syns i cache_read_input_tokens och i kortare tid
+till första token. Därefter genereras CV-frågor för tre CV:n till samma roll.
+Prefix under 1024 tokens cachas inte alls.
+"""
+import os
+import sqlite3
+import tempfile
+
+from mock_anthropic import start_mock_server
+
+server = start_mock_server()
+os.environ['ANTHROPIC_BASE_URL'] = f'http://localhost:{server.server_address[1]}'
+os.environ['ANTHROPIC_API_KEY'] = 'mock'
+bench_dir = tempfile.mkdtemp()
+os.environ['DB_PATH'] = os.path.join(bench_dir, 'bench.db')
+os.environ['ARCHIVE_DB_PATH'] = os.path.join(bench_dir, 'bench_archive.db')
+
+import app
+
+ROLE_QUESTIONS = [
+    {"category": "Teknisk kompetens", "question": "Berätta om din tekniska bakgrund och de system du arbetat mest med."},
+    {"category": "Ledarskap", "question": "Beskriv en situation där du ledde en förändring som mötte motstånd."},
+    {"category": "Teambuilding", "question": "Hur bygger du förtroende i ett nytt team?"},
+    {"category": "Affärsmässighet", "question": "Hur prioriterar du mellan kundkrav och teknisk skuld?"},
+    {"category": "Innovation", "question": "Hur har du använt AI eller automatisering för att förbättra ett arbetsflöde?"},
+    {"category": "Hållbarhet", "question": "Hur tar du hänsyn till hållbarhet i tekniska beslut?"},
+]
+
+ROLE_DESCRIPTION = "Leder ett team på tolv utvecklare och ansvarar för plattformens arkitektur."
+
+# Varje kandidat har egna personliga frågor, precis som i appen
+PERSONAL_QUESTIONS = [
+    [{"category": "Personlig", "question": f"Berätta om ditt arbete på {company}."},
+     {"category": "Personlig", "question": f"Vad lärde du dig av projektet {project}?"},
+     {"category": "Personlig", "question": f"Varför lämnade du {company}?"},
+     {"category": "Personlig", "question": f"Hur använde du {skill} i praktiken?"}]
+    for company, project, skill in (("Volvo", "Atlas", "Kubernetes"),
+                                    ("Ericsson", "Nova", "Rust"),
+                                    ("Klarna", "Orion", "Kafka"))
+]
+
+def main():
+    for i, personal_questions in enumerate(PERSONAL_QUESTIONS):
+        transcript = f"Intervju {i}: " + "Jag har arbetat med utveckling i många år. " * 40
+        app.analyze_with_claude(ROLE_QUESTIONS, personal_questions, transcript, "Utvecklingschef")
+
+    for i in range(3):
+        cv_text = f"CV {i}: " + "Utvecklare med erfarenhet av molntjänster och ledarskap. " * (20 + i)
+        app.generate_cv_questions(cv_text, "Utvecklingschef", ROLE_DESCRIPTION, ROLE_QUESTIONS)
+
+    conn = sqlite3.connect(os.environ['DB_PATH'])
+    rows = conn.execute('''SELECT call_type, input_tokens, cache_creation_input_tokens,
+                                  cache_read_input_tokens, ttft_ms
+                           FROM api_usage ORDER BY id''').fetchall()
+    conn.close()
+
+    print(f"{'anrop':<14}{'input':>8}{'cache_write':>13}{'cache_read':>12}{'ttft':>9}")
+    for call_type, input_tokens, cache_write, cache_read, ttft_ms in rows:
+        print(f"{call_type:<14}{input_tokens:>8}{cache_write:>13}{cache_read:>12}{ttft_ms:>6} ms")
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""Jämför lagring av kandidater som ren text och som komprimerade blobbar.
+
+Kör: python bench_storage.py [antal_kandidater] [--sample fil.txt]
+
+Rapporterar databasstorlek, tid för listningsfrågan och tid för att hämta
+en kandidat i detalj, före (ren text) och efter (komprimerade kolumner).
+Båda databaserna kör samma frågor, så skillnaden beror bara på
+komprimeringen. Listningen mäts både med appens kolumnurval och med
+SELECT c.* som läser de tunga fälten.
+
+Texten genereras som standard ur ett stort svenskliknande ordförråd där
+orden dras med Zipf-fördelning, som i naturligt språk, så att den
+komprimeras ungefär som riktiga CV:n och transkriptioner. Med --sample
+används i stället utdrag ur en textfil, till exempel riktiga
+transkriptioner, vilket ger de mest rättvisande siffrorna.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from storage import compress_text, decompress_row
+
+SYLLABLES = ('an ar be de en er fö ga he in ka la le li ma me ni nu om pa ra re '
+             'sa se sk st ta te ti to tr un va ve vi yr ål än ör ber dra fri gen '
+             'het lig ning skap tion ande ende ens era iska rätt verk arb led'
+             ).split()
+
+NAMES = ('Anna Erik Maria Karl Sara Johan Lena Anders Emma Lars Fatima Ahmed '
+         'Volvo Ericsson Klarna Spotify Skanska Region Kommunen').split()
+
+VOCABULARY_SIZE = 20000
+
+# Fylls av setup_text() före bygget
+TEXT_SOURCE = {}
+
+SCHEMA = '''
+CREATE TABLE roles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT,
+    questions TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE candidates (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    role_id INTEGER,
+    cv_text TEXT,
+    personal_questions TEXT,
+    all_questions TEXT,
+    transcript TEXT,
+    analysis TEXT,
+    total_score INTEGER,
+    interview_date TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (role_id) REFERENCES roles (id)
+);
+'''
+
+LIST_ALL_COLUMNS = '''
+    SELECT c.*, r.name as role_name
+    FROM candidates c
+    LEFT JOIN roles r ON c.role_id = r.id
+    ORDER BY c.total_score DESC, c.created_at DESC
+'''
+
+LIST_PROJECTED = '''
+    SELECT c.id, c.name, c.role_id, c.total_score, c.interview_date, c.created_at,
+           r.name as role_name
+    FROM candidates c
+    LEFT JOIN roles r ON c.role_id = r.id
+    ORDER BY c.total_score DESC, c.created_at DESC
+'''
+
+DETAIL = '''
+    SELECT c.*, r.name as role_name, r.description as role_description
+    FROM candidates c
+    LEFT JOIN roles r ON c.role_id = r.id
+    WHERE c.id = ?
+'''
+
+def setup_text(sample_path=None):
+    """Förbered textkällan: ett Zipf-fördelat ordförråd eller en exempelfil"""
+    if sample_path:
+        with open(sample_path, encoding='utf-8') as f:
+            TEXT_SOURCE['sample'] = f.read().split()
+        return
+
+    rng = random.Random(1)
+    vocabulary = set()
+    while len(vocabulary) < VOCABULARY_SIZE:
+        vocabulary.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.choice((1, 2, 2, 3, 3, 4)))))
+    TEXT_SOURCE['words'] = sorted(vocabulary)
+    rng.shuffle(TEXT_SOURCE['words'])
+    TEXT_SOURCE['cum_weights'] = list(itertools.accumulate(
+        1 / rank for rank in range(1, VOCABULARY_SIZE + 1)))
+
+def fake_text(rng, n_words):
+    if 'sample' in TEXT_SOURCE:
+        sample = TEXT_SOURCE['sample']
+        start = rng.randrange(max(1, len(sample) - n_words))
+        return ' '.join(sample[start:start + n_words])
+
+    words = rng.choices(TEXT_SOURCE['words'], cum_weights=TEXT_SOURCE['cum_weights'], k=n_words)
+    sentences = []
+    while words:
+        length = rng.randint(5, 20)
+        sentence, words = words[:length], words[length:]
+        # Namn och siffror förekommer i CV:n och intervjuer och komprimeras sämre
+        if rng.random() < 0.3:
+            sentence[rng.randrange(len(sentence))] = rng.choice(NAMES)
+        if rng.random() < 0.2:
+            sentence[rng.randrange(len(sentence))] = str(rng.choice((rng.randint(1990, 2025), rng.randint(2, 500))))
+        sentence[0] = sentence[0].capitalize()
+        sentences.append(' '.join(sentence) + rng.choice('..,?'))
+    return ' '.join(sentences)
+
+def build_db(path, count, compressed):
+    rng = random.Random(42)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    for i in range(10):
+        conn.execute('INSERT INTO roles (name, description) VALUES (?, ?)',
+                     (f'Roll {i}', fake_text(rng, 80)))
+    wrap = compress_text if compressed else (lambda text: text)
+    for i in range(count):
+        analysis = json.dumps({
+            "overall_assessment": fake_text(rng, 60),
+            "summarized_transcript": fake_text(rng, 200),
+            "questions": [{"question": fake_text(rng, 15), "score": rng.randint(1, 5),
+                           "summary": fake_text(rng, 30), "assessment": fake_text(rng, 30),
+                           "quote": fake_text(rng, 15)} for _ in range(10)]
+        }, ensure_ascii=False)
+        conn.execute(
+            '''INSERT INTO candidates (name, role_id, cv_text, transcript, analysis, total_score)
+               VALUES (?, ?, ?, ?, ?, ?)''',
+            (f'Kandidat {i}', rng.randint(1, 10), wrap(fake_text(rng, 800)),
+             wrap(fake_text(rng, 15000)), wrap(analysis), rng.randint(10, 50))
+        )
+    conn.commit()
+    conn.close()
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def measure(path, count):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    rng = random.Random(7)
+
+    def listing(query):
+        return lambda: [dict(row) for row in conn.execute(query).fetchall()]
+
+    def detail():
+        row = conn.execute(DETAIL, (rng.randint(1, count),)).fetchone()
+        candidate = decompress_row(row)
+        json.loads(candidate['analysis'])
+
+    result = {
+        "size_kb": os.path.getsize(path) / 1024,
+        "list_ms": timed(listing(LIST_PROJECTED), 20),
+        "list_all_ms": timed(listing(LIST_ALL_COLUMNS), 20),
+        "detail_ms": timed(detail, 200),
+    }
+    conn.close()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='Jämför okomprimerad och komprimerad lagring')
+    parser.add_argument('count', nargs='?', type=int, default=500, help='antal kandidater')
+    parser.add_argument('--sample', help='textfil att ta CV- och transkriptionstext från')
+    args = parser.parse_args()
+    count = args.count
+    setup_text(args.sample)
+    with tempfile.TemporaryDirectory() as tmp:
+        before_path = os.path.join(tmp, 'before.db')
+        after_path = os.path.join(tmp, 'after.db')
+        build_db(before_path, count, compressed=False)
+        build_db(after_path, count, compressed=True)
+        before = measure(before_path, count)
+        after = measure(after_path, count)
+
+    print(f"{count} kandidater")
+    print(f"{'':14}{'före':>12}{'efter':>12}")
+    print(f"{'DB-storlek':14}{before['size_kb']:>9.0f} kB{after['size_kb']:>9.0f} kB")
+    print(f"{'Listning':14}{before['list_ms']:>9.2f} ms{after['list_ms']:>9.2f} ms")
+    print(f"{'Listning c.*':14}{before['list_all_ms']:>9.2f} ms{after['list_all_ms']:>9.2f} ms")
+    print(f"{'Detaljvy':14}{before['detail_ms']:>9.3f} ms{after['detail_ms']:>9.3f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""Lokal mock av Anthropics Messages API med prompt-cache.
+
+Kör: python mock_anthropic.py [port]
+och sätt ANTHROPIC_BASE_URL=http://localhost:<port> i .env.
+
+Mocken efterliknar cachningen: prefixet fram till och med varje block med
+cache_control cachas om det når minst 1024 tokens. Det längsta prefix som
+redan finns i cachen rapporteras som cache_read_input_tokens, resten fram
+till sista brytpunkten som cache_creation_input_tokens. Okachade tokens ger en fördröjning före första
+token, så att skillnaden i time-to-first-token syns.
+"""
+import hashlib
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CACHE_MIN_TOKENS = 1024
+
+# Simulerad bearbetningstid per okachad input-token
+SECONDS_PER_TOKEN = 0.0005
+
+MOCK_ANALYSIS = json.dumps({
+    "overall_assessment": "Mock-bedömning.",
+    "summarized_transcript": "Mock-sammanfattning.",
+    "questions": []
+}, ensure_ascii=False)
+
+def estimate_tokens(text):
+    return len(text) // 4
+
+def _blocks(body):
+    """Alla textblock i request-ordning: system först, sedan meddelandena"""
+    system = body.get('system') or []
+    if isinstance(system, str):
+        system = [{"type": "text", "text": system}]
+    blocks = list(system)
+    for message in body.get('messages', []):
+        content = message['content']
+        if isinstance(content, str):
+            content = [{"type": "text", "text": content}]
+        blocks.extend(content)
+    return blocks
+
+class MockState:
+    def __init__(self):
+        self.cache = set()
+        self.lock = threading.Lock()
+
+    def usage_for(self, body):
+        blocks = _blocks(body)
+        sizes = [estimate_tokens(block.get('text', '')) for block in blocks]
+        total = sum(sizes)
+
+        # Varje brytpunkt vars prefix når minimigränsen ger en cachepost.
+        # Det längsta prefix som redan finns läses, resten fram till sista
+        # brytpunkten skrivs.
+        entries = []
+        for i, block in enumerate(blocks):
+            prefix_tokens = sum(sizes[:i + 1])
+            if block.get('cache_control') and prefix_tokens >= CACHE_MIN_TOKENS:
+                key = hashlib.sha256(json.dumps(
+                    [body.get('model')] + [b.get('text', '') for b in blocks[:i + 1]]
+                ).encode('utf-8')).hexdigest()
+                entries.append((key, prefix_tokens))
+
+        cache_read = cache_write = 0
+        with self.lock:
+            for key, prefix_tokens in entries:
+                if key in self.cache:
+                    cache_read = prefix_tokens
+            if entries:
+                cache_write = entries[-1][1] - cache_read
+                self.cache.update(key for key, _ in entries)
+
+        return {
+            "input_tokens": total - cache_read - cache_write,
+            "output_tokens": estimate_tokens(MOCK_ANALYSIS),
+            "cache_creation_input_tokens": cache_write,
+            "cache_read_input_tokens": cache_read
+        }
+
+STATE = MockState()
+
+class MockHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.startswith('/v1/messages'):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        usage = STATE.usage_for(body)
+
+        time.sleep((usage['input_tokens'] + usage['cache_creation_input_tokens']) * SECONDS_PER_TOKEN)
+
+        message = {
+            "id": "msg_mock", "type": "message", "role": "assistant",
+            "model": body.get('model'), "content": [],
+            "stop_reason": None, "stop_sequence": None, "usage": dict(usage, output_tokens=1)
+        }
+
+        if not body.get('stream'):
+            message.update(content=[{"type": "text", "text": MOCK_ANALYSIS}],
+                           stop_reason="end_turn", usage=usage)
+            payload = json.dumps(message).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        events = [
+            ('message_start', {"type": "message_start", "message": message}),
+            ('content_block_start', {"type": "content_block_start", "index": 0,
+                                     "content_block": {"type": "text", "text": ""}}),
+            ('content_block_delta', {"type": "content_block_delta", "index": 0,
+                                     "delta": {"type": "text_delta", "text": MOCK_ANALYSIS}}),
+            ('content_block_stop', {"type": "content_block_stop", "index": 0}),
+            ('message_delta', {"type": "message_delta",
+                               "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                               "usage": {"output_tokens": usage['output_tokens']}}),
+            ('message_stop', {"type": "message_stop"}),
+        ]
+        for event, data in events:
+            self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+def start_mock_server(port=0):
+    """Starta mocken i en bakgrundstråd och returnera servern"""
+    server = ThreadingHTTPServer(('localhost', port), MockHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
+    print(f"Mock av Anthropic API på http://localhost:{port}")
+    ThreadingHTTPServer(('localhost', port), MockHandler).serve_forever()
@@ -0,0 +1,117 @@
+import hashlib
+import random
+import re
+import struct
+
+# MinHash med 128 permutationer uppdelade i 16 LSH-band om 8 rader.
+# Tröskeln där två CV:n med stor sannolikhet hamnar i samma hink blir
+# ungefär (1/16)^(1/8) ≈ 0.7 i Jaccard-likhet.
+NUM_PERM = 128
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SHINGLE_SIZE = 5
+
+# Från denna likhet räknas två CV:n som nära dubbletter
+DUPLICATE_THRESHOLD = 0.8
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Fast seed så att signaturer som sparats i databasen går att jämföra mellan omstarter
+_rng = random.Random(1)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+                 for _ in range(NUM_PERM)]
+
+_SIGNATURE_FORMAT = f'<{NUM_PERM}I'
+
+def shingles(text):
+    """Ordbaserade shingles av normaliserad text"""
+    words = re.findall(r'\w+', (text or '').lower())
+    if len(words) < SHINGLE_SIZE:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+def _hash_shingle(shingle):
+    return struct.unpack('<I', hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest())[0]
+
+def minhash_signature(text):
+    """Beräkna MinHash-signaturen för en text. Returnerar None för tom text."""
+    hashes = [_hash_shingle(s) for s in shingles(text)]
+    if not hashes:
+        return None
+    return [min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in _PERMUTATIONS]
+
+def pack_signature(signature):
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+def unpack_signature(blob):
+    return list(struct.unpack(_SIGNATURE_FORMAT, blob))
+
+def band_keys(signature):
+    """Hinknycklar per LSH-band"""
+    packed = pack_signature(signature)
+    band_size = LSH_ROWS * 4
+    return [
+        (band, hashlib.blake2b(packed[band * band_size:(band + 1) * band_size],
+                               digest_size=8).hexdigest())
+        for band in range(LSH_BANDS)
+    ]
+
+def estimate_similarity(sig_a, sig_b):
+    """Uppskattad Jaccard-likhet mellan två signaturer"""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+def init_similarity_tables(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS cv_minhash (
+        candidate_id INTEGER PRIMARY KEY,
+        signature BLOB NOT NULL
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS cv_lsh_buckets (
+        band INTEGER NOT NULL,
+        bucket TEXT NOT NULL,
+        candidate_id INTEGER NOT NULL
+    )''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_lsh_bucket ON cv_lsh_buckets (band, bucket)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_lsh_candidate ON cv_lsh_buckets (candidate_id)')
+
+def index_cv(conn, candidate_id, cv_text):
+    """Spara MinHash-signatur och LSH-hinkar för en kandidats CV"""
+    remove_from_index(conn, candidate_id)
+    signature = minhash_signature(cv_text)
+    if signature is None:
+        return
+    conn.execute('INSERT INTO cv_minhash (candidate_id, signature) VALUES (?, ?)',
+                 (candidate_id, pack_signature(signature)))
+    conn.executemany('INSERT INTO cv_lsh_buckets (band, bucket, candidate_id) VALUES (?, ?, ?)',
+                     [(band, bucket, candidate_id) for band, bucket in band_keys(signature)])
+
+def remove_from_index(conn, candidate_id):
+    conn.execute('DELETE FROM cv_minhash WHERE candidate_id = ?', (candidate_id,))
+    conn.execute('DELETE FROM cv_lsh_buckets WHERE candidate_id = ?', (candidate_id,))
+
+def find_similar(conn, signature, threshold=DUPLICATE_THRESHOLD, exclude_id=None, limit=10):
+    """Hitta kandidater med liknande CV via LSH-hinkarna.
+
+    Returnerar en lista med (candidate_id, likhet) sorterad på likhet."""
+    if signature is None:
+        return []
+    keys = band_keys(signature)
+    conditions = ' OR '.join('(b.band = ? AND b.bucket = ?)' for _ in keys)
+    params = [value for key in keys for value in key]
+    rows = conn.execute(f'''
+        SELECT DISTINCT m.candidate_id, m.signature
+        FROM cv_lsh_buckets b
+        JOIN cv_minhash m ON m.candidate_id = b.candidate_id
+        WHERE {conditions}
+    ''', params).fetchall()
+
+    matches = []
+    for candidate_id, blob in rows:
+        if candidate_id == exclude_id:
+            continue
+        similarity = estimate_similarity(signature, unpack_signature(blob))
+        if similarity >= threshold:
+            matches.append((candidate_id, similarity))
+    matches.sort(key=lambda match: match[1], reverse=True)
+    return matches[:limit]
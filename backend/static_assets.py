@@ -0,0 +1,129 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Filtyper som lönar sig att förkomprimera
+COMPRESSIBLE_EXTENSIONS = ('.html', '.js', '.css', '.json', '.map', '.svg', '.txt', '.ico')
+MIN_COMPRESS_SIZE = 1024
+
+# Filändelser för förkomprimerade varianter, i prioritetsordning
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# CRA lägger innehållshashen i filnamnet, t.ex. static/js/main.1a2b3c4d.js
+HASHED_ASSET = re.compile(r'^static/.+\.[0-9a-f]{8,}\.(chunk\.)?\w+$')
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+
+# Fingeravtryck av frontendens byggindata, skrivs av start.py
+BUILD_STAMP = '.build-stamp'
+
+# start.py bygger till versionerade mappar (build-<tid>) och pekar ut den
+# aktuella i den här filen, som byts ut atomiskt med os.replace
+CURRENT_BUILD_POINTER = 'current-build'
+
+def resolve_build_dir(frontend_dir):
+    """Aktuell build-mapp enligt pekarfilen, annars frontend/build"""
+    try:
+        with open(os.path.join(frontend_dir, CURRENT_BUILD_POINTER)) as f:
+            name = f.read().strip()
+    except OSError:
+        name = ''
+    if name and os.path.isdir(os.path.join(frontend_dir, name)):
+        return os.path.join(frontend_dir, name)
+    return os.path.join(frontend_dir, 'build')
+
+def read_build_stamp(build_dir):
+    """Läs build-mappens stämpel (None om den saknas)"""
+    try:
+        with open(os.path.join(build_dir, BUILD_STAMP)) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def _is_variant(filename):
+    return filename.endswith(tuple(suffix for _, suffix in ENCODINGS))
+
+def precompress_build(build_dir):
+    """Skriv .gz- och .br-varianter bredvid komprimerbara filer i build-mappen.
+
+    Varianter som redan är nyare än källfilen hoppas över. Returnerar antalet
+    skrivna filer."""
+    written = 0
+    for root, _, files in os.walk(build_dir):
+        for filename in files:
+            if _is_variant(filename) or not filename.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.join(root, filename)
+            if os.path.getsize(path) < MIN_COMPRESS_SIZE:
+                continue
+            source_mtime = os.path.getmtime(path)
+
+            data = None
+            for encoding, suffix in ENCODINGS:
+                if encoding == 'br' and brotli is None:
+                    continue
+                target = path + suffix
+                if os.path.exists(target) and os.path.getmtime(target) >= source_mtime:
+                    continue
+                if data is None:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                if encoding == 'br':
+                    compressed = brotli.compress(data, quality=11)
+                else:
+                    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                # Spara bara varianten om den faktiskt blir mindre
+                if len(compressed) >= len(data):
+                    continue
+                with open(target, 'wb') as f:
+                    f.write(compressed)
+                written += 1
+    return written
+
+def build_manifest(build_dir):
+    """Bygg ett manifest i minnet över build-mappen: sökväg -> filinformation"""
+    manifest = {}
+    if not os.path.isdir(build_dir):
+        return manifest
+
+    for root, _, files in os.walk(build_dir):
+        for filename in files:
+            if _is_variant(filename) or filename == BUILD_STAMP:
+                continue
+            path = os.path.join(root, filename)
+            rel_path = os.path.relpath(path, build_dir).replace(os.sep, '/')
+
+            with open(path, 'rb') as f:
+                etag = hashlib.md5(f.read()).hexdigest()[:16]
+
+            variants = {}
+            for encoding, suffix in ENCODINGS:
+                variant_path = path + suffix
+                if os.path.exists(variant_path):
+                    variants[encoding] = variant_path
+
+            manifest[rel_path] = {
+                'path': path,
+                'mimetype': mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+                'etag': etag,
+                'variants': variants,
+                'cache_control': IMMUTABLE_CACHE if HASHED_ASSET.match(rel_path) else REVALIDATE_CACHE
+            }
+    return manifest
+
+def choose_variant(entry, accept_encodings):
+    """Välj bästa förkomprimerade variant som klienten accepterar.
+
+    Returnerar (encoding, sökväg), där encoding är None för okomprimerad fil."""
+    for encoding, _ in ENCODINGS:
+        if encoding in entry['variants'] and accept_encodings[encoding]:
+            return encoding, entry['variants'][encoding]
+    return None, entry['path']
@@ -0,0 +1,44 @@
+import zlib
+import sqlite3
+
+# Tunga textkolumner som lagras zlib-komprimerade i candidates-tabellen
+COMPRESSED_COLUMNS = ('cv_text', 'transcript', 'analysis')
+
+COMPRESSION_LEVEL = 6
+
+def compress_text(text):
+    """Komprimera text till en zlib-blob (None och tom text lämnas orörda)"""
+    if not text:
+        return text
+    return sqlite3.Binary(zlib.compress(text.encode('utf-8'), COMPRESSION_LEVEL))
+
+def decompress_text(value):
+    """Packa upp en komprimerad kolumn. Äldre rader med ren text returneras som de är."""
+    if value is None or isinstance(value, str):
+        return value
+    return zlib.decompress(value).decode('utf-8')
+
+def decompress_row(row):
+    """Gör om en kandidatrad till dict och packa upp de komprimerade kolumnerna"""
+    row_dict = dict(row)
+    for column in COMPRESSED_COLUMNS:
+        if column in row_dict:
+            row_dict[column] = decompress_text(row_dict[column])
+    return row_dict
+
+def migrate_compressed_columns(conn, table='candidates'):
+    """Komprimera befintliga rader som fortfarande lagras som ren text.
+
+    Returnerar antalet uppdaterade kolumnvärden."""
+    migrated = 0
+    for column in COMPRESSED_COLUMNS:
+        rows = conn.execute(
+            f"SELECT id, {column} FROM {table} WHERE typeof({column}) = 'text'"
+        ).fetchall()
+        for row_id, value in rows:
+            conn.execute(
+                f'UPDATE {table} SET {column} = ? WHERE id = ?',
+                (compress_text(value), row_id)
+            )
+        migrated += len(rows)
+    return migrated
@@ -17,6 +17,8 @@ function App() {
   const [roleQuestions, setRoleQuestions] = useState([]);
   const [cvText, setCvText] = useState('');
   const [personalQuestions, setPersonalQuestions] = useState([]);
+  const [reusedFrom, setReusedFrom] = useState(null);
+  const [questionSuggestion, setQuestionSuggestion] = useState(null);
   const [allQuestions, setAllQuestions] = useState([]);
   const [candidateName, setCandidateName] = useState('');
   const [transcript, setTranscript] = useState('');
@@ -184,7 +186,7 @@ function App() {
     setLoading(false);
   };
 
-  const generatePersonalQuestions = async () => {
+  const generatePersonalQuestions = async (forceNew = false) => {
     if (!cvText.trim()) {
       showMessage('Ladda upp eller klistra in CV först', 'error');
       return;
@@ -197,6 +199,8 @@ function App() {
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
           cv_text: cvText,
+          role_id: selectedRole?.id,
+          force_new: forceNew,
           role_name: selectedRole?.name || '',
           role_description: selectedRole?.description || ''
         })
@@ -207,7 +211,13 @@ function App() {
         showMessage(data.error, 'error');
       } else {
         setPersonalQuestions(data.questions);
-        showMessage('Personliga frågor genererade!');
+        setReusedFrom(data.similar_candidate || null);
+        setQuestionSuggestion(data.suggestion || null);
+        if (data.similar_candidate) {
+          showMessage('Nästan samma CV finns sedan tidigare – frågorna återanvändes.');
+        } else {
+          showMessage('Personliga frågor genererade!');
+        }
       }
     } catch (err) {
       showMessage('Kunde inte generera frågor', 'error');
@@ -215,6 +225,12 @@ function App() {
     setLoading(false);
   };
 
+  const applySuggestedQuestions = () => {
+    setPersonalQuestions(questionSuggestion.questions);
+    setReusedFrom(questionSuggestion.similar_candidate);
+    setQuestionSuggestion(null);
+  };
+
   const prepareCandidate = async () => {
     if (!selectedRole) {
       showMessage('Välj en roll först', 'error');
@@ -374,6 +390,8 @@ function App() {
   const resetForNewCandidate = () => {
     setCvText('');
     setPersonalQuestions([]);
+    setReusedFrom(null);
+    setQuestionSuggestion(null);
     setCandidateName('');
     setTranscript('');
     setAnalysisResult(null);
@@ -567,7 +585,7 @@ function App() {
                 </div>
 
                 {cvText && (
-                  <button className="btn btn-primary" onClick={generatePersonalQuestions}>
+                  <button className="btn btn-primary" onClick={() => generatePersonalQuestions()}>
                     Generera personliga frågor
                   </button>
                 )}
@@ -578,6 +596,26 @@ function App() {
             {personalQuestions.length > 0 && (
               <div className="card">
                 <h2 className="card-title">Personliga frågor (baserade på CV)</h2>
+                {reusedFrom && (
+                  <div style={{ marginBottom: '1rem', display: 'flex', alignItems: 'center', gap: '0.5rem' }}>
+                    <span>
+                      Återanvända från {reusedFrom.name || 'tidigare kandidat'} ({reusedFrom.role_name || 'okänd roll'}, {Math.round(reusedFrom.similarity * 100)} % likhet).
+                    </span>
+                    <button className="btn btn-secondary btn-sm" onClick={() => generatePersonalQuestions(true)}>
+                      Generera nya frågor
+                    </button>
+                  </div>
+                )}
+                {questionSuggestion && (
+                  <div style={{ marginBottom: '1rem', display: 'flex', alignItems: 'center', gap: '0.5rem' }}>
+                    <span>
+                      Nästan samma CV finns hos {questionSuggestion.similar_candidate.name || 'tidigare kandidat'} för en annan roll ({questionSuggestion.similar_candidate.role_name || 'okänd roll'}, {Math.round(questionSuggestion.similar_candidate.similarity * 100)} % likhet).
+                    </span>
+                    <button className="btn btn-secondary btn-sm" onClick={applySuggestedQuestions}>
+                      Använd de frågorna
+                    </button>
+                  </div>
+                )}
                 <div className="questions-list">
                   {personalQuestions.map((q, i) => (
                     <div key={i} className="question-item">
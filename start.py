@@ -1,27 +1,114 @@
+import argparse
+import glob
+import hashlib
+import shutil
 import subprocess
 import sys
 import os
+import time
 
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 FRONTEND_DIR = os.path.join(ROOT_DIR, 'frontend')
 BACKEND_DIR = os.path.join(ROOT_DIR, 'backend')
 
-print("=== Bygger frontend ===")
-result = subprocess.run(
-    ['npm', 'run', 'build'],
-    cwd=FRONTEND_DIR,
-    shell=True
-)
+# Allt som påverkar resultatet av npm run build
+BUILD_INPUTS = ['src', 'public', 'package.json', 'package-lock.json']
+
+sys.path.insert(0, BACKEND_DIR)
+from static_assets import (BUILD_STAMP, CURRENT_BUILD_POINTER, read_build_stamp,
+                           precompress_build, resolve_build_dir)
+
+def fingerprint_frontend():
+    """SHA-256 över sökvägar och innehåll i frontendens byggindata"""
+    digest = hashlib.sha256()
+    for name in BUILD_INPUTS:
+        path = os.path.join(FRONTEND_DIR, name)
+        if os.path.isfile(path):
+            files = [path]
+        else:
+            files = [os.path.join(root, f) for root, _, names in os.walk(path) for f in names]
+        for file_path in sorted(files):
+            digest.update(os.path.relpath(file_path, FRONTEND_DIR).replace(os.sep, '/').encode('utf-8'))
+            with open(file_path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+def build_frontend(fingerprint):
+    """Bygg till en ny versionerad mapp och peka sedan om backend till den.
+
+    Pekarfilen byts ut atomiskt. Den tidigare builden ligger kvar tills nästa
+    bygge, så att förfrågningar som redan pågår mot den kan slutföras."""
+    previous_dir = resolve_build_dir(FRONTEND_DIR)
+    build_dir = os.path.join(FRONTEND_DIR, f'build-{int(time.time())}')
+    result = subprocess.run(
+        ['npm', 'run', 'build'],
+        cwd=FRONTEND_DIR,
+        env=dict(os.environ, BUILD_PATH=build_dir),
+        # npm är ett .cmd-skript på Windows och behöver skalet där
+        shell=(os.name == 'nt')
+    )
+    if result.returncode != 0:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        return False
+
+    # Förkomprimera build-filerna (gzip/brotli) så att backend kan servera dem direkt
+    print(f"Förkomprimerade {precompress_build(build_dir)} filer")
+    with open(os.path.join(build_dir, BUILD_STAMP), 'w') as f:
+        f.write(fingerprint)
 
-if result.returncode != 0:
-    print("Fel vid bygge av frontend!")
-    sys.exit(1)
+    pointer = os.path.join(FRONTEND_DIR, CURRENT_BUILD_POINTER)
+    with open(pointer + '.tmp', 'w') as f:
+        f.write(os.path.basename(build_dir))
+    os.replace(pointer + '.tmp', pointer)
+
+    # Städa bort äldre versionerade builds utom den nya och den föregående
+    for old_dir in glob.glob(os.path.join(FRONTEND_DIR, 'build-*')):
+        if old_dir not in (build_dir, previous_dir):
+            shutil.rmtree(old_dir, ignore_errors=True)
+    return True
+
+def stop_backend(process):
+    """Stoppa backend inklusive Flasks reloader-process"""
+    if process.poll() is not None:
+        return
+    if os.name == 'nt':
+        # terminate() dödar bara föräldraprocessen på Windows
+        subprocess.run(['taskkill', '/T', '/F', '/PID', str(process.pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    else:
+        process.terminate()
+    process.wait()
+
+parser = argparse.ArgumentParser(description='Bygg frontend vid behov och starta servern')
+parser.add_argument('--force-build', action='store_true', help='bygg frontend även om inget ändrats')
+args = parser.parse_args()
+
+fingerprint = fingerprint_frontend()
+needs_build = args.force_build or read_build_stamp(resolve_build_dir(FRONTEND_DIR)) != fingerprint
 
 print("\n=== Startar server ===")
 print("Appen körs på http://localhost:5000")
 print("Dela via ngrok: ngrok http 5000\n")
 
-subprocess.run(
+# Backend startar direkt och serverar föregående build tills den nya är klar
+backend = subprocess.Popen(
     [sys.executable, 'app.py'],
     cwd=BACKEND_DIR
 )
+
+try:
+    if needs_build:
+        print("=== Bygger frontend ===")
+        if not build_frontend(fingerprint):
+            print("Fel vid bygge av frontend!")
+            if not os.path.exists(os.path.join(resolve_build_dir(FRONTEND_DIR), 'index.html')):
+                sys.exit(1)
+            print("Föregående build används.")
+    else:
+        print("=== Frontend oförändrad, hoppar över bygget ===")
+
+    backend.wait()
+except KeyboardInterrupt:
+    pass
+finally:
+    stop_backend(backend)